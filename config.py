@@ -1,31 +1,120 @@
 import os
+import urllib.parse
+from dataclasses import dataclass
+from functools import lru_cache
+
 from dotenv import load_dotenv
 
-# Load .env file
-load_dotenv()
 
-#Set normalizer version
-NORMALIZER_VERSION = os.getenv("NORMALIZER_VERSION", "v1")
+@dataclass(frozen=True)
+class Settings:
+    # SQL credentials
+    SQL_SERVER: str
+    SQL_DATABASE: str
+    SQL_USER: str
+    SQL_PASSWORD: str
+
+    # Company code control
+    COMPANY_CODE: str
+
+    # Source system to match: buildops | spectrum | both
+    SYSTEM: str
+
+    # Normalizer version: v1 | v2
+    NORMALIZER_VERSION: str
+
+    # Maximum fuzzy distance
+    MAX_DIST: int
+
+    # Batch Levenshtein backend: rapidfuzz | numba
+    DISTANCE_BACKEND: str
+
+    # Pipeline flags
+    RUN_SCORES_PER_BATCH: bool
+    RUN_FINAL_SCORE_ONLY: bool
+
+    # Rows per customer chunk read from SQL
+    READ_CHUNKSIZE: int
+
+    # Company codes processed in parallel (worker processes); 1 runs them
+    # one after another
+    MAX_WORKERS: int
+
+    # Candidate blocking: client (pandas) | sql (database join)
+    BLOCKING_MODE: str
+
+    # Client blocking key: first_char | qgram | prefix | neighborhood
+    BLOCKING_KEY: str
+
+    # ResultsBI load path: executemany | tvp | bulk
+    INSERT_METHOD: str
+
+    # Bulk load staging directory as this machine writes it, and the same
+    # directory as the SQL Server service reads it (defaults to the former)
+    BULK_INSERT_DIR: str
+    BULK_INSERT_SERVER_DIR: str
+
+    # Result rows sent per insert round trip
+    INSERT_BATCH_SIZE: int
+
+    @property
+    def CONNECTION_STRING(self) -> str:
+        """SQLAlchemy (pyodbc) URL; the password may contain special chars."""
+        password = urllib.parse.quote_plus(self.SQL_PASSWORD or "")
+        return (
+            f"mssql+pyodbc://{self.SQL_USER}:{password}@{self.SQL_SERVER}/{self.SQL_DATABASE}"
+            "?driver=ODBC+Driver+17+for+SQL+Server"
+        )
+
+
+def _flag(value: str) -> bool:
+    return value.strip().lower() == "true"
 
-# SQL credentials
-SQL_SERVER = os.getenv("SQL_SERVER")
-SQL_DATABASE = os.getenv("SQL_DATABASE")
-SQL_USER = os.getenv("SQL_USER")
-SQL_PASSWORD = os.getenv("SQL_PASSWORD")
 
-# Company code control
-DEFAULT_COMPANY_CODE = os.getenv("COMPANY_CODE", "ALL")
+def _choice(name: str, default: str, allowed: tuple) -> str:
+    """Lower-cased env setting, rejected unless it is one of allowed."""
+    value = os.getenv(name, default).strip().lower()
+    if value not in allowed:
+        raise ValueError(f"{name} must be one of {set(allowed)}, got '{value}'")
+    return value
 
-# Pipeline flags
-RUN_SCORES_PER_BATCH = os.getenv("RUN_SCORES_PER_BATCH", "True") == "True"
-RUN_FINAL_SCORE_ONLY = os.getenv("RUN_FINAL_SCORE_ONLY", "False") == "True"
 
-# Maximum fuzzy distance
-MAX_DIST = int(os.getenv("DIST", "5"))
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Parse .env and the environment once per process."""
+    load_dotenv()
+    blocking_mode = _choice("BLOCKING_MODE", "client", ("client", "sql"))
+    blocking_key = _choice("BLOCKING_KEY", "first_char", ("first_char", "qgram", "prefix", "neighborhood"))
+    if blocking_mode == "sql" and blocking_key != "first_char":
+        raise ValueError(f"BLOCKING_KEY={blocking_key} requires BLOCKING_MODE=client, got 'sql'")
+    insert_method = _choice("INSERT_METHOD", "executemany", ("executemany", "tvp", "bulk"))
+    bulk_insert_dir = os.getenv("BULK_INSERT_DIR", "")
+    if insert_method == "bulk" and not bulk_insert_dir:
+        raise ValueError("INSERT_METHOD=bulk requires BULK_INSERT_DIR to be set")
+    return Settings(
+        SQL_SERVER=os.getenv("SQL_SERVER"),
+        SQL_DATABASE=os.getenv("SQL_DATABASE"),
+        SQL_USER=os.getenv("SQL_USER"),
+        SQL_PASSWORD=os.getenv("SQL_PASSWORD"),
+        COMPANY_CODE=os.getenv("COMPANY_CODE", "ALL"),
+        SYSTEM=os.getenv("SYSTEM", "BuildOps").strip().lower(),
+        NORMALIZER_VERSION=os.getenv("NORMALIZER_VERSION", "v1").strip().lower(),
+        MAX_DIST=int(os.getenv("DIST", "5")),
+        DISTANCE_BACKEND=_choice("DISTANCE_BACKEND", "rapidfuzz", ("rapidfuzz", "numba")),
+        RUN_SCORES_PER_BATCH=_flag(os.getenv("RUN_SCORES_PER_BATCH", "False")),
+        RUN_FINAL_SCORE_ONLY=_flag(os.getenv("RUN_FINAL_SCORE_ONLY", "False")),
+        READ_CHUNKSIZE=int(os.getenv("READ_CHUNKSIZE", "50000")),
+        # Parallel runs are opt-in: each worker builds its own engine, so SQL
+        # sessions can reach MAX_WORKERS x (pool_size + max_overflow), and
+        # the per-code log lines of concurrent runs interleave
+        MAX_WORKERS=int(os.getenv("MAX_WORKERS", "1")),
+        BLOCKING_MODE=blocking_mode,
+        BLOCKING_KEY=blocking_key,
+        INSERT_METHOD=insert_method,
+        INSERT_BATCH_SIZE=int(os.getenv("INSERT_BATCH_SIZE", "10000")),
+        BULK_INSERT_DIR=bulk_insert_dir,
+        BULK_INSERT_SERVER_DIR=os.getenv("BULK_INSERT_SERVER_DIR", "") or bulk_insert_dir,
+    )
 
-# Build SQLAlchemy connection string (pyodbc)
-CONNECTION_STRING = (
-    f"mssql+pyodbc://{SQL_USER}:{SQL_PASSWORD}@{SQL_SERVER}/{SQL_DATABASE}"
-    "?driver=ODBC+Driver+17+for+SQL+Server"
-)
 
+SETTINGS = get_settings()
@@ -1,10 +1,18 @@
-import pyodbc
-from config import SQL_SERVER, SQL_DATABASE, SQL_USER, SQL_PASSWORD
+from functools import lru_cache
 
-def get_connection():
-    return pyodbc.connect(
-        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-        f"SERVER={SQL_SERVER};"
-        f"DATABASE={SQL_DATABASE};"
-        f"UID={SQL_USER};PWD={SQL_PASSWORD}"
+from sqlalchemy import create_engine
+from config import SETTINGS
+
+@lru_cache(maxsize=None)
+def get_engine(conn_str: str = SETTINGS.CONNECTION_STRING):
+    """
+    One pooled engine per connection string for the whole process, so
+    company codes reuse open connections instead of re-handshaking.
+    """
+    return create_engine(
+        conn_str,
+        fast_executemany=True,
+        pool_size=8,
+        pool_pre_ping=True,
+        pool_recycle=1800,
     )
@@ -1,94 +1,65 @@
 import argparse
-from dotenv import load_dotenv
-import os
-import urllib.parse
 
-from pipeline import run_pipeline, load_all_company_codes, get_engine
+from config import SETTINGS
+from db import get_engine
+from pipeline import run_pipeline_for_codes, load_all_company_codes
 from utils import timestamp
 
-# Load environment variables from .env
-load_dotenv()
+VALID_SYSTEMS = ("buildops", "spectrum", "both")
 
-# ------------------------------------------------------
-# READ FROM EXISTING .env
-# ------------------------------------------------------
-SERVER = os.getenv("SQL_SERVER")
-DATABASE = os.getenv("SQL_DATABASE")
-USER = os.getenv("SQL_USER")
-PASSWORD = os.getenv("SQL_PASSWORD")        # may contain special chars
-COMPANY_CODE = os.getenv("COMPANY_CODE", "ALL")
+SOURCE_SYSTEMS = {
+    "buildops": ("BUILDOPS",),
+    "spectrum": ("SPECTRUM",),
+    "both": ("BUILDOPS", "SPECTRUM"),
+}
 
-# New SYSTEM variable
-SYSTEM = os.getenv("SYSTEM", "BuildOps").strip().lower()
 
-# Scoring params
-MAX_DIST = int(os.getenv("DIST", "5"))
-BATCH_SCORES = os.getenv("RUN_SCORES_PER_BATCH", "False").lower() == "true"
-FINAL_SCORE_ONLY = os.getenv("RUN_FINAL_SCORE_ONLY", "False").lower() == "true"
+def parse_args(argv=None):
+    """Command-line overrides for the .env settings."""
+    parser = argparse.ArgumentParser(description="Match BI customers to Salesforce accounts.")
+    parser.add_argument("--system", type=str.lower, choices=VALID_SYSTEMS, default=SETTINGS.SYSTEM)
+    parser.add_argument("--company-code", default=SETTINGS.COMPANY_CODE)
+    parser.add_argument("--workers", type=int, default=SETTINGS.MAX_WORKERS)
+    return parser.parse_args(argv)
 
-# ------------------------------------------------------
-# SAFELY ENCODE PASSWORD FOR SQLALCHEMY URL
-# ------------------------------------------------------
-ENCODED_PASSWORD = urllib.parse.quote_plus(PASSWORD)
 
-# ------------------------------------------------------
-# BUILD SQLALCHEMY CONNECTION STRING
-# ------------------------------------------------------
-CONN_STR = (
-    f"mssql+pyodbc://{USER}:{ENCODED_PASSWORD}@{SERVER}/{DATABASE}"
-    f"?driver=ODBC+Driver+17+for+SQL+Server"
-)
+def main(argv=None):
+    args = parse_args(argv)
+
+    # ------------------------------------------------------
+    # Validate SYSTEM value early
+    # ------------------------------------------------------
+    if args.system not in VALID_SYSTEMS:
+        raise ValueError(
+            f"SYSTEM must be one of {set(VALID_SYSTEMS)}, got '{args.system}'"
+        )
 
-def main():
     print(f"[{timestamp()}] Loading SQL engine...")
-    engine = get_engine(CONN_STR)
+    engine = get_engine(SETTINGS.CONNECTION_STRING)
 
     # ------------------------------------------------------
     # Determine which company codes to run
     # ------------------------------------------------------
-    if COMPANY_CODE.upper() == "ALL":
+    if args.company_code.upper() == "ALL":
         print(f"[{timestamp()}] 🔍 Loading ALL company codes from Salesforce Partner__c ...")
         company_list = load_all_company_codes(engine)
         print(f"[{timestamp()}] Found {len(company_list)} company codes: {company_list}")
     else:
-        company_list = [COMPANY_CODE]
-
-    # ------------------------------------------------------
-    # Validate SYSTEM value early
-    # ------------------------------------------------------
-    valid_systems = {"buildops", "spectrum", "both"}
-    if SYSTEM not in valid_systems:
-        raise ValueError(
-            f"SYSTEM must be one of {valid_systems}, got '{SYSTEM}'"
-        )
+        company_list = [args.company_code]
 
     # ------------------------------------------------------
     # Execute pipeline for each company code
     # ------------------------------------------------------
-    for code in company_list:
-        print(f"\n[{timestamp()}] === Running company code: {code} ===")
-
-        if SYSTEM in ("buildops", "both"):
-            run_pipeline(
-                engine=engine,
-                company_code=code,
-                max_dist=MAX_DIST,
-                source_system="BUILDOPS",
-                batch_scores=BATCH_SCORES,
-                final_scores=FINAL_SCORE_ONLY,
-            )
-
-        if SYSTEM in ("spectrum", "both"):
-            run_pipeline(
-                engine=engine,
-                company_code=code,
-                max_dist=MAX_DIST,
-                source_system="SPECTRUM",
-                batch_scores=BATCH_SCORES,
-                final_scores=FINAL_SCORE_ONLY,
-            )
-
-        print(f"[{timestamp()}] === Finished company code: {code} ===\n")
+    # Company codes are independent, so run them across worker processes
+    run_pipeline_for_codes(
+        SETTINGS.CONNECTION_STRING,
+        company_list,
+        workers=args.workers,
+        source_systems=SOURCE_SYSTEMS[args.system],
+        max_dist=SETTINGS.MAX_DIST,
+        batch_scores=SETTINGS.RUN_SCORES_PER_BATCH,
+        final_scores=SETTINGS.RUN_FINAL_SCORE_ONLY,
+    )
 
     print(f"[{timestamp()}] === ALL DONE ===")
 
@@ -1,26 +1,53 @@
-import os
 import re
+from functools import lru_cache
 
-NORMALIZER_VERSION = os.getenv("NORMALIZER_VERSION", "v1").strip().lower()
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Levenshtein
 
-# Try to use rapidfuzz; if unavailable, we gracefully degrade
+import matcher_fast
+from config import SETTINGS
+
+# pyarrow is optional; without it normalize_many falls back to normalize()
 try:
-    from rapidfuzz import fuzz
-    _HAS_RAPIDFUZZ = True
-except Exception:
-    fuzz = None
-    _HAS_RAPIDFUZZ = False
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+NORMALIZER_VERSION = SETTINGS.NORMALIZER_VERSION
+MAX_DIST = SETTINGS.MAX_DIST
+DISTANCE_BACKEND = SETTINGS.DISTANCE_BACKEND
+
+# Threads per batch scoring call (rapidfuzz cpdist and the numba kernel);
+# -1 uses every core. Pool workers lower it so processes x threads stays
+# within the machine.
+SCORING_THREADS = -1
+
+
+def set_scoring_threads(n: int):
+    """Cap the threads each batch scoring call in this process may use."""
+    global SCORING_THREADS
+    SCORING_THREADS = max(int(n), 1)
+    matcher_fast.set_kernel_threads(SCORING_THREADS)
 
 
 ######################################################################
 # NORMALIZER V1 (LEGACY)
 ######################################################################
 
+# Both normalizers are pure, and the same raw names recur across pairs,
+# chunks and source systems, so results are memoized per process
+NORMALIZE_CACHE_SIZE = 1 << 18
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_v1(name: str) -> str:
     if not name:
         return ""
     # Keep this intentionally conservative to preserve legacy behavior
-    return re.sub(r"\s+", " ", str(name).lower().strip())
+    # (split/join == strip + collapse runs of whitespace)
+    return " ".join(str(name).lower().split())
 
 
 ######################################################################
@@ -34,6 +61,14 @@ LEGAL_SUFFIXES = {
 
 STOPWORDS = {"the"}
 
+_DROP_TOKENS = frozenset(STOPWORDS | LEGAL_SUFFIXES)
+
+# Punctuation -> space. ASCII input goes through a translate table (one C
+# pass); anything else uses the regex, since \w is Unicode-aware.
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_PUNCT_TABLE = str.maketrans({chr(i): " " for i in range(128) if _PUNCT_RE.match(chr(i))})
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_v2(name: str) -> str:
     if not name:
         return ""
@@ -44,20 +79,10 @@ def normalize_v2(name: str) -> str:
     s = s.replace("&", " and ")
 
     # Remove punctuation -> spaces
-    s = re.sub(r"[^\w\s]", " ", s)
-
-    # Collapse whitespace
-    s = re.sub(r"\s+", " ", s).strip()
-
-    tokens = []
-    for t in s.split():
-        if t in STOPWORDS:
-            continue
-        if t in LEGAL_SUFFIXES:
-            continue
-        tokens.append(t)
+    s = s.translate(_PUNCT_TABLE) if s.isascii() else _PUNCT_RE.sub(" ", s)
 
-    return " ".join(tokens)
+    # Collapse whitespace and drop stopwords / legal suffixes
+    return " ".join(t for t in s.split() if t not in _DROP_TOKENS)
 
 
 def normalize(name: str) -> str:
@@ -70,41 +95,92 @@ def normalize(name: str) -> str:
     return normalize_v1(name)
 
 
+######################################################################
+# COLUMN NORMALIZATION (ARROW)
+######################################################################
+# normalize_v2's rules as Arrow compute kernels over a whole column.
+# Arrow's regexes and case mapping only agree with Python's str methods on
+# ASCII, so non-ASCII names go through normalize().
+
+# What str.split() treats as whitespace within ASCII
+_ASCII_WS_PATTERN = r"[\t\n\x0b\x0c\r\x1c-\x1f ]+"
+_ASCII_PUNCT_PATTERN = "[" + "".join(
+    "\\x%02x" % i for i in range(128) if _PUNCT_RE.match(chr(i))
+) + "]"
+
+def _arrow_collapse_ws(arr):
+    arr = pc.replace_substring_regex(arr, _ASCII_WS_PATTERN, " ")
+    return pc.ascii_trim(arr, " ")
+
+def _arrow_normalize_v2(arr):
+    arr = pc.replace_substring(pc.ascii_lower(arr), "&", " and ")
+    arr = _arrow_collapse_ws(pc.replace_substring_regex(arr, _ASCII_PUNCT_PATTERN, " "))
+
+    # Drop stopword / legal-suffix tokens and re-join the rest
+    tokens = pc.split_pattern(arr, " ")
+    flat = pc.list_flatten(tokens)
+    keep = pc.invert(pc.is_in(flat, value_set=pa.array(sorted(_DROP_TOKENS))))
+    parents = pc.list_parent_indices(tokens).to_numpy()[keep.to_numpy(zero_copy_only=False)]
+    offsets = np.zeros(len(arr) + 1, dtype=np.int32)
+    np.cumsum(np.bincount(parents, minlength=len(arr)), out=offsets[1:])
+    kept = pa.ListArray.from_arrays(pa.array(offsets), flat.filter(keep))
+    return pc.binary_join(kept, " ")
+
+def normalize_many(names) -> np.ndarray:
+    """
+    normalize() over a sequence of names, as an object array. Under v2,
+    ASCII names go through Arrow kernels when pyarrow is installed.
+    """
+    names = np.asarray(names, dtype=object)
+    # v1 is two C-level str calls per name, which beats the Arrow round trip
+    if not HAS_ARROW or NORMALIZER_VERSION != "v2" or len(names) == 0:
+        return np.array([normalize(n) for n in names], dtype=object)
+
+    try:
+        arr = pa.array(names, type=pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Non-string values; normalize() str()s them
+        return np.array([normalize(n) for n in names], dtype=object)
+
+    arr = arr.fill_null("")
+    out = _arrow_normalize_v2(arr).to_numpy(zero_copy_only=False).astype(object)
+
+    for i in np.flatnonzero(~pc.string_is_ascii(arr).to_numpy(zero_copy_only=False)):
+        out[i] = normalize(names[i])
+    return out
+
+
 ######################################################################
 # DISTANCE (LEGACY)
 ######################################################################
-# NOTE: you likely already have a compute_distance implementation.
-# If you currently use python-Levenshtein, keep it. Below is a safe fallback.
+# rapidfuzz's bit-parallel Levenshtein (64 chars per machine word) is used
+# everywhere; there is no pure-python fallback.
 
-try:
-    from Levenshtein import distance as _lev_distance
-except Exception:
-    _lev_distance = None
-
-def compute_distance(a: str, b: str) -> int:
-    a = a or ""
-    b = b or ""
-    if _lev_distance is not None:
-        return int(_lev_distance(a, b))
-
-    # Fallback Levenshtein (pure python)
-    if a == b:
-        return 0
-    if not a:
-        return len(b)
-    if not b:
-        return len(a)
-
-    prev = list(range(len(b) + 1))
-    for i, ca in enumerate(a, start=1):
-        curr = [i]
-        for j, cb in enumerate(b, start=1):
-            ins = curr[j - 1] + 1
-            dele = prev[j] + 1
-            sub = prev[j - 1] + (ca != cb)
-            curr.append(min(ins, dele, sub))
-        prev = curr
-    return prev[-1]
+def compute_distance(a: str, b: str, max_dist: int = MAX_DIST) -> int:
+    """
+    Levenshtein distance, or max_dist + 1 once it is known to exceed
+    max_dist (the banded variant stops early). max_dist=None computes the
+    full distance.
+    """
+    return Levenshtein.distance(a or "", b or "", score_cutoff=max_dist)
+
+
+def compute_distances(a, b, max_dist: int = MAX_DIST) -> np.ndarray:
+    """
+    Element-wise compute_distance over two equal-length sequences,
+    computed in C on SCORING_THREADS threads.
+    Controlled by env: DISTANCE_BACKEND=rapidfuzz|numba
+    """
+    if DISTANCE_BACKEND == "numba" and matcher_fast.HAS_NUMBA:
+        return matcher_fast.levenshtein_pairs(a, b, max_dist)
+
+    return process.cpdist(
+        a, b,
+        scorer=Levenshtein.distance,
+        score_cutoff=max_dist,
+        workers=SCORING_THREADS,
+        dtype=np.int32,
+    )
 
 
 ######################################################################
@@ -116,7 +192,7 @@ def fuzzy_similarity_score(a: str, b: str) -> int:
     Returns 0..100 similarity score.
     Uses token-based scorers to handle reorder/extra tokens.
     """
-    if not a or not b or not _HAS_RAPIDFUZZ:
+    if not a or not b:
         return 0
 
     # Composite: take max of several robust scorers
@@ -128,6 +204,23 @@ def fuzzy_similarity_score(a: str, b: str) -> int:
     ))
 
 
+def fuzzy_similarity_scores(a, b) -> np.ndarray:
+    """
+    Element-wise fuzzy_similarity_score over two equal-length sequences.
+    """
+    scores = np.zeros(len(a), dtype=np.float64)
+    if len(a) == 0:
+        return scores.astype(np.int32)
+
+    for scorer in (fuzz.WRatio, fuzz.token_set_ratio, fuzz.token_sort_ratio, fuzz.partial_ratio):
+        np.maximum(
+            scores,
+            process.cpdist(a, b, scorer=scorer, workers=SCORING_THREADS, dtype=np.float64),
+            out=scores,
+        )
+    return scores.astype(np.int32)
+
+
 def fuzzy_score_to_dist(score_0_100: int, max_dist: int) -> int:
     """
     Converts 0..100 similarity to a 'distance-like' integer so it can fit
@@ -150,3 +243,14 @@ def fuzzy_score_to_dist(score_0_100: int, max_dist: int) -> int:
         return 3
 
     return max_dist
+
+
+def fuzzy_scores_to_dist(scores: np.ndarray, max_dist: int) -> np.ndarray:
+    """
+    Vectorized fuzzy_score_to_dist.
+    """
+    return np.select(
+        [scores >= 95, scores >= 90, scores >= 85, scores >= 80],
+        [0, 1, 2, 3],
+        default=max_dist,
+    )
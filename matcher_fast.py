@@ -0,0 +1,134 @@
+import numpy as np
+
+# Numba is optional; without it matcher.compute_distances stays on rapidfuzz
+try:
+    from numba import config, njit, prange, set_num_threads
+    HAS_NUMBA = True
+except Exception:
+    HAS_NUMBA = False
+
+
+def set_kernel_threads(n: int):
+    """Threads the parallel kernel uses, within numba's launch-time maximum."""
+    if HAS_NUMBA:
+        set_num_threads(max(min(n, config.NUMBA_NUM_THREADS), 1))
+
+
+######################################################################
+# ENCODING
+######################################################################
+
+def encode_names(names):
+    """
+    Encode strings as one flat array of dense int32 symbol ids plus
+    per-name offsets (name i is symbols[offsets[i]:offsets[i + 1]]).
+    Also returns the alphabet size, which bounds the Peq lookup table.
+    """
+    lengths = np.fromiter(map(len, names), dtype=np.int64, count=len(names))
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    code_points = np.frombuffer("".join(names).encode("utf-32-le"), dtype=np.uint32)
+    alphabet, symbols = np.unique(code_points, return_inverse=True)
+    return symbols.astype(np.int32), offsets, max(len(alphabet), 1)
+
+
+######################################################################
+# KERNELS
+######################################################################
+
+if HAS_NUMBA:
+
+    @njit(cache=True)
+    def _myers64(sym, a0, m, b0, n, cutoff, peq):
+        """
+        Hyyrö's bit-parallel Levenshtein for a pattern of m <= 64 symbols:
+        one uint64 column state per text symbol instead of an m-row DP.
+        Returns cutoff + 1 as soon as the distance must exceed cutoff.
+        """
+        one = np.uint64(1)
+        for i in range(m):
+            peq[sym[a0 + i]] |= one << np.uint64(i)
+
+        pv = ~np.uint64(0)
+        mv = np.uint64(0)
+        high = one << np.uint64(m - 1)
+        score = m
+        result = -1
+        for j in range(n):
+            eq = peq[sym[b0 + j]]
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | ~(xh | pv)
+            mh = pv & xh
+            if ph & high:
+                score += 1
+            elif mh & high:
+                score -= 1
+            # Each remaining text symbol can lower the score by at most one
+            if score - (n - j - 1) > cutoff:
+                result = cutoff + 1
+                break
+            ph = (ph << one) | one
+            mh = mh << one
+            pv = mh | ~(xv | ph)
+            mv = ph & xv
+
+        for i in range(m):
+            peq[sym[a0 + i]] = np.uint64(0)
+        return score if result < 0 else result
+
+    @njit(cache=True)
+    def _dp(sym, a0, m, b0, n, cutoff):
+        """Two-row Levenshtein DP for names longer than 64 symbols."""
+        prev = np.arange(n + 1)
+        curr = np.empty(n + 1, dtype=prev.dtype)
+        for i in range(1, m + 1):
+            curr[0] = i
+            row_min = i
+            ca = sym[a0 + i - 1]
+            for j in range(1, n + 1):
+                cost = prev[j - 1] + (0 if ca == sym[b0 + j - 1] else 1)
+                cost = min(cost, prev[j] + 1, curr[j - 1] + 1)
+                curr[j] = cost
+                row_min = min(row_min, cost)
+            if row_min > cutoff:
+                return cutoff + 1
+            prev, curr = curr, prev
+        return min(prev[n], cutoff + 1)
+
+    @njit(parallel=True, cache=True)
+    def _levenshtein_pairs(sym, offsets, n_pairs, alphabet_size, cutoff, out):
+        # Pair k compares name k with name n_pairs + k
+        for k in prange(n_pairs):
+            a0, a1 = offsets[k], offsets[k + 1]
+            b0, b1 = offsets[n_pairs + k], offsets[n_pairs + k + 1]
+            m, n = a1 - a0, b1 - b0
+            # Shorter string is the bit-parallel pattern
+            if m > n:
+                a0, b0, m, n = b0, a0, n, m
+            if n - m > cutoff:
+                out[k] = cutoff + 1
+            elif m == 0:
+                out[k] = n
+            elif m <= 64:
+                peq = np.zeros(alphabet_size, dtype=np.uint64)
+                out[k] = _myers64(sym, a0, m, b0, n, cutoff, peq)
+            else:
+                out[k] = _dp(sym, a0, m, b0, n, cutoff)
+
+
+def levenshtein_pairs(a, b, max_dist=None) -> np.ndarray:
+    """
+    Element-wise Levenshtein distance over two equal-length sequences of
+    str, clipped to max_dist + 1 (max_dist=None computes full distances).
+    """
+    n_pairs = len(a)
+    out = np.empty(n_pairs, dtype=np.int32)
+    if n_pairs == 0:
+        return out
+
+    sym, offsets, alphabet_size = encode_names(list(a) + list(b))
+    cutoff = np.iinfo(np.int32).max - 1 if max_dist is None else int(max_dist)
+    _levenshtein_pairs(sym, offsets, n_pairs, alphabet_size, cutoff, out)
+    return out
@@ -1,9 +1,19 @@
 import re
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+_NON_ALNUM_TABLE = str.maketrans({chr(i): None for i in range(128) if _NON_ALNUM_RE.match(chr(i))})
+
+LEGAL_SUFFIXES = ["llc","inc","co","company","corp","corporation","ltd"]
+
+# Suffixes are stripped one after another in LEGAL_SUFFIXES order, each at
+# most once. That is the same as one anchored match of optional groups in
+# reverse order after the shortest possible stem, so build that regex once.
+_SUFFIX_RE = re.compile(
+    r'^(.*?)' + ''.join(f'(?:{re.escape(s)})?' for s in reversed(LEGAL_SUFFIXES)) + r'$'
+)
+
 def normalize_name(name):
     if not name: return ""
     name=name.lower()
-    name=re.sub(r'[^a-z0-9]','',name)
-    for s in ["llc","inc","co","company","corp","corporation","ltd"]:
-        if name.endswith(s):
-            name=name[:-len(s)]
-    return name.strip()
+    name=name.translate(_NON_ALNUM_TABLE) if name.isascii() else _NON_ALNUM_RE.sub('',name)
+    return _SUFFIX_RE.match(name).group(1)
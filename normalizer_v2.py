@@ -8,6 +8,11 @@ LEGAL_SUFFIXES = {
 
 STOPWORDS = {"the", "and", "&"}
 
+_DROP_TOKENS = frozenset(STOPWORDS | LEGAL_SUFFIXES)
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_PUNCT_TABLE = str.maketrans({chr(i): " " for i in range(128) if _PUNCT_RE.match(chr(i))})
+
 def _clean_company_name(name: str) -> str:
     if not name:
         return ""
@@ -17,18 +22,10 @@ def _clean_company_name(name: str) -> str:
     # replace symbols
     name = name.replace("&", " and ")
 
-    # remove punctuation
-    name = re.sub(r"[^\w\s]", " ", name)
-
-    tokens = []
-    for token in name.split():
-        if token in STOPWORDS:
-            continue
-        if token in LEGAL_SUFFIXES:
-            continue
-        tokens.append(token)
+    # remove punctuation (translate table for ASCII, regex otherwise)
+    name = name.translate(_PUNCT_TABLE) if name.isascii() else _PUNCT_RE.sub(" ", name)
 
-    return " ".join(tokens)
+    return " ".join(t for t in name.split() if t not in _DROP_TOKENS)
 
 def _acronym(name: str) -> str:
     return "".join(word[0] for word in name.split() if len(word) > 2)
@@ -1,17 +1,58 @@
+import multiprocessing as mp
+import os
+import uuid
+from multiprocessing import util as mp_util
+from functools import partial
+
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 
 from matcher import (
-    compute_distance,
-    normalize,
-    fuzzy_similarity_score,
-    fuzzy_score_to_dist,
+    compute_distances,
+    normalize_many,
+    fuzzy_similarity_scores,
+    fuzzy_scores_to_dist,
+    set_scoring_threads,
 )
 
+from config import SETTINGS
+from db import get_engine
+from scorer import (
+    vectorized_email_score,
+    vectorized_city_score,
+    vectorized_phone_score,
+    vectorized_zip_score,
+    vectorized_state_score,
+)
 from utils import timestamp
 
 PIPELINE_VERSION = "1.0.7"
 
+# Rows per customer chunk read from SQL
+READ_CHUNKSIZE = SETTINGS.READ_CHUNKSIZE
+
+# Candidate pairs must differ in raw name length by at most this many
+# characters, under every blocking key. The shared first letter is part of
+# the first_char key (and of qgram/prefix, which build on it), not of this
+# window; neighborhood blocking does not require it.
+NAME_LEN_WINDOW = 3
+
+# Where candidate pairs are blocked: client (pandas) | sql (database join)
+BLOCKING_MODE = SETTINGS.BLOCKING_MODE
+
+# Client-side blocking key on top of first char + length window:
+# first_char (nothing more) | qgram (also share a 3-gram of the first
+# QGRAM_SPAN normalized characters) | prefix (also share the first
+# PREFIX_LEN normalized characters) | neighborhood (instead of the first
+# char join: BI/SF names within NEIGHBORHOOD_WINDOW places of each other
+# in sorted normalized-name order, still inside the length window)
+BLOCKING_KEY = SETTINGS.BLOCKING_KEY
+QGRAM_SIZE = 3
+QGRAM_SPAN = 6
+PREFIX_LEN = 3
+NEIGHBORHOOD_WINDOW = 10
+
 ######################################################################
 # STATE NORMALIZATION
 ######################################################################
@@ -37,155 +78,620 @@ US_STATE_MAP = {
 }
 
 def normalize_state(s: str) -> str:
-    if not s:
+    if not s or not isinstance(s, str):
         return ""
     s = s.strip()
     if len(s) == 2:
         return s.upper()
     return US_STATE_MAP.get(s.lower(), "")
 
+# Process-wide dictionary of normalized states, so codes from the account
+# and customer frames are comparable; "" (unknown) is always 0
+_STATE_CODES = {"": 0}
+
+def state_code(s) -> int:
+    """normalize_state() dictionary-encoded as an int, so pair comparisons are integer compares."""
+    s = normalize_state(s)
+    return _STATE_CODES.setdefault(s, len(_STATE_CODES))
+
+# Same for cities, compared lower-cased and stripped
+_CITY_CODES = {"": 0}
+
+def city_code(c) -> int:
+    """Lower-cased, stripped city dictionary-encoded as an int; 0 when missing."""
+    c = c.lower().strip() if isinstance(c, str) else ""
+    return _CITY_CODES.setdefault(c, len(_CITY_CODES))
+
+# Emails score on their domain (lower-cased, stripped; "" without an "@"),
+# so each present email is encoded by domain and a missing one is 0
+_EMAIL_DOMAIN_CODES = {}
+
+def email_domain_code(e) -> int:
+    """Domain of a lower-cased, stripped email dictionary-encoded as an int; 0 when missing."""
+    e = e.lower().strip() if isinstance(e, str) else ""
+    if not e:
+        return 0
+    domain = e.partition("@")[2].strip()
+    return _EMAIL_DOMAIN_CODES.setdefault(domain, len(_EMAIL_DOMAIN_CODES) + 1)
+
 ######################################################################
 # HELPERS
 ######################################################################
 
+# Deletes every ASCII non-digit; only exact for ASCII input, since str.isdigit()
+# also accepts non-ASCII digits
+_ASCII_NON_DIGITS = dict.fromkeys((c for c in range(128) if not 48 <= c <= 57), None)
+
+def _digits(value) -> str:
+    value = str(value)
+    if value.isascii():
+        return value.translate(_ASCII_NON_DIGITS)
+    return "".join(c for c in value if c.isdigit())
+
 def normalize_phone(p):
     if not p:
         return ""
-    digits = "".join(c for c in str(p) if c.isdigit())
+    digits = _digits(p)
     return digits[-10:] if len(digits) >= 7 else ""
 
 def normalize_zip(z):
     if not z:
         return ""
-    digits = "".join(c for c in str(z) if c.isdigit())
+    digits = _digits(z)
     return digits[:5] if len(digits) >= 5 else ""
 
-def email_domain(e):
-    if not e or "@" not in e:
-        return ""
-    return e.split("@", 1)[1].lower().strip()
+def normalize_unique(values: pd.Series, fn) -> pd.Series:
+    """Apply fn to each distinct value once and map the results back; missing -> ""."""
+    values = values.fillna("")
+    uniq = values.unique()
+    return values.map(dict(zip(uniq, map(fn, uniq))))
 
-######################################################################
-# ENGINE
-######################################################################
+def normalize_names(names: pd.Series) -> pd.Series:
+    """normalize() each distinct name once (Arrow kernels where possible) and map the results back."""
+    names = names.fillna("")
+    uniq = names.unique()
+    return names.map(dict(zip(uniq, normalize_many(uniq))))
 
-def get_engine(conn_str: str):
-    return create_engine(conn_str, fast_executemany=True)
+def first_char_code(name) -> int:
+    """
+    Integer blocking key for the upper-cased first character; 0 when there
+    is no name. Code points are shared across frames, unlike per-frame
+    category codes. Characters that upper-case to several letters
+    (e.g. 'ß' -> 'SS') get their own key above the Unicode range.
+    """
+    if not isinstance(name, str) or not name:
+        return 0
+    upper = name[0].upper()
+    return ord(upper) if len(upper) == 1 else 0x110000 + ord(name[0])
+
+def add_name_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalized name and integer blocking keys, computed once per loaded frame."""
+    df["NameNorm"] = normalize_names(df["Name"])
+    df["FirstChar"] = np.fromiter(map(first_char_code, df["Name"]), dtype=np.int32, count=len(df))
+    df["NameLen"] = df["Name"].str.len().fillna(0).astype(np.int16)
+    return df
+
+# Contact columns compared in compute_matches, normalized once per loaded
+# frame into a "<column>N" sibling so pairs never re-normalize them
+SF_CONTACT_NORMALIZERS = {
+    "Phone": normalize_phone,
+    "BillingPostalCode": normalize_zip,
+    "ShippingPostalCode": normalize_zip,
+    "BillingState": state_code,
+    "ShippingState": state_code,
+    "BillingCity": city_code,
+    "ShippingCity": city_code,
+    "Email__c": email_domain_code,
+}
+BI_CONTACT_NORMALIZERS = {
+    "Phone": normalize_phone,
+    "Zip": normalize_zip,
+    "State": state_code,
+    "City": city_code,
+    "Customer_Email": email_domain_code,
+}
+# Same columns as named on a candidate pair (server-side blocking path)
+PAIR_CONTACT_NORMALIZERS = {
+    "BIPhone": normalize_phone,
+    "SFPhone": normalize_phone,
+    "BIZip": normalize_zip,
+    "SFBillingPostalCode": normalize_zip,
+    "SFShippingPostalCode": normalize_zip,
+    "BIState": state_code,
+    "SFBillingState": state_code,
+    "SFShippingState": state_code,
+    "BICity": city_code,
+    "SFBillingCity": city_code,
+    "SFShippingCity": city_code,
+    "BIEmail": email_domain_code,
+    "SFEmail": email_domain_code,
+}
+
+def add_contact_keys(df: pd.DataFrame, normalizers: dict) -> pd.DataFrame:
+    for col, fn in normalizers.items():
+        df[col + "N"] = normalize_unique(df[col], fn)
+    return df
 
 ######################################################################
 # LOADERS
 ######################################################################
 
+# Text columns are stored Arrow-backed (one UTF-8 buffer + offsets per
+# column) when pyarrow is installed, with NaN for missing values. pandas
+# before 2.1 has no NaN-backed Arrow string storage, so text stays object.
+try:
+    import pyarrow  # noqa: F401
+    try:
+        ARROW_STRING_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        try:
+            ARROW_STRING_DTYPE = pd.StringDtype("pyarrow_numpy")
+        except (TypeError, ValueError):
+            ARROW_STRING_DTYPE = None
+except ImportError:
+    ARROW_STRING_DTYPE = None
+
+def arrow_strings(df: pd.DataFrame) -> pd.DataFrame:
+    if ARROW_STRING_DTYPE is None:
+        return df
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) in ("string", "empty"):
+            df[col] = df[col].astype(ARROW_STRING_DTYPE)
+    return df
+
+def read_sql(query: str, engine, params: dict = None, chunksize: int = None):
+    """pd.read_sql with Arrow-backed text columns; a chunk iterator if chunksize is set."""
+    result = pd.read_sql(text(query), engine, params=params, chunksize=chunksize)
+    if chunksize:
+        return map(arrow_strings, result)
+    return arrow_strings(result)
+
+
+# Supporting indexes (apply on the source databases; not created here):
+#   CREATE INDEX IX_Partner_CompanyCode ON creteProd.Partner__c (Company_Code__c);
+#   CREATE INDEX IX_Account_Partner_Unlinked ON creteProd.Account (Partner__c)
+#       INCLUDE (Name, Email__c, Phone, BillingCity, BillingState, BillingPostalCode,
+#                ShippingCity, ShippingState, ShippingPostalCode)
+#       WHERE Spectrum_Customer_Code__c IS NULL;
+SF_ACCOUNTS_SQL = """
+    SELECT
+        a.Id,
+        a.Name,
+        a.Email__c,
+        a.Phone,
+        a.BillingCity,
+        a.BillingState,
+        a.BillingPostalCode,
+        a.ShippingCity,
+        a.ShippingState,
+        a.ShippingPostalCode,
+        a.Spectrum_Customer_Code__c
+    FROM salesforce.creteProd.Account a
+    INNER JOIN salesforce.creteProd.Partner__c p
+        ON a.Partner__c = p.Id
+    WHERE a.Spectrum_Customer_Code__c IS NULL
+      AND p.Company_Code__c = :cc
+"""
+
 def load_sf_accounts(engine, company_code: str) -> pd.DataFrame:
-    query = """
-        SELECT
-            a.Id,
-            a.Name,
-            a.Email__c,
-            a.Phone,
-            a.BillingCity,
-            a.BillingState,
-            a.BillingPostalCode,
-            a.ShippingCity,
-            a.ShippingState,
-            a.ShippingPostalCode,
-            a.Spectrum_Customer_Code__c
-        FROM salesforce.creteProd.Account a
-        INNER JOIN salesforce.creteProd.Partner__c p
-            ON a.Partner__c = p.Id
-        WHERE a.Spectrum_Customer_Code__c IS NULL
-          AND p.Company_Code__c = :cc;
-    """
-    return pd.read_sql(text(query), engine, params={"cc": company_code})
+    return read_sql(SF_ACCOUNTS_SQL, engine, params={"cc": company_code})
 
 
-def load_spectrum_customers(engine, company_code: str) -> pd.DataFrame:
-    query = """
-        SELECT
-            Customer_Code AS CustomerId,
-            Customer_Code AS CustomerNumber,
-            Name,
-            Customer_Email,
-            Phone,
-            City,
-            State,
-            Zip_Code AS Zip
-        FROM salesforce.Spectrum.CR_CUSTOMER_MASTER_MC
-        WHERE Company_Code = :cc
-          AND Status = 'A';
+# Accounts for the most recent company, already normalized. main.py runs
+# BUILDOPS then SPECTRUM for the same code, so the second run reuses them.
+_sf_accounts_cache = {}
+
+def get_sf_accounts(engine, company_code: str) -> pd.DataFrame:
+    if company_code not in _sf_accounts_cache:
+        df_sf = add_name_keys(load_sf_accounts(engine, company_code))
+        df_sf = add_contact_keys(df_sf, SF_CONTACT_NORMALIZERS)
+        _sf_accounts_cache.clear()
+        _sf_accounts_cache[company_code] = df_sf
+    return _sf_accounts_cache[company_code]
+
+
+# Supporting index:
+#   CREATE INDEX IX_CustomerMaster_Company_Status ON Spectrum.CR_CUSTOMER_MASTER_MC (Company_Code, Status)
+#       INCLUDE (Customer_Code, Name, Customer_Email, Phone, City, State, Zip_Code);
+SPECTRUM_CUSTOMERS_SQL = """
+    SELECT
+        Customer_Code AS CustomerId,
+        Customer_Code AS CustomerNumber,
+        Name,
+        Customer_Email,
+        Phone,
+        City,
+        State,
+        Zip_Code AS Zip
+    FROM salesforce.Spectrum.CR_CUSTOMER_MASTER_MC
+    WHERE Company_Code = :cc
+      AND Status = 'A'
+"""
+
+def load_spectrum_customers(engine, company_code: str, chunksize: int = None):
+    return read_sql(SPECTRUM_CUSTOMERS_SQL, engine, params={"cc": company_code}, chunksize=chunksize)
+
+
+# The company filter is an expression over accountingRefId, so it can only
+# seek through a persisted computed column with its own index, e.g.:
+#   ALTER TABLE dbo.Customers ADD CompanyPrefix AS UPPER(LEFT(LTRIM(RTRIM(accountingRefId)), 3)) PERSISTED;
+#   CREATE INDEX IX_Customers_CompanyPrefix ON dbo.Customers (CompanyPrefix, isActive)
+#       INCLUDE (id, accountingRefId, name, email, phonePrimary, phoneAlternate,
+#                address0_city, address0_state, address0_zipcode);
+# SQL Server matches the identical expression below to that column.
+BUILDOPS_CUSTOMERS_SQL = """
+    SELECT
+        id AS CustomerId,
+
+        CASE
+            WHEN CHARINDEX('/', LTRIM(RTRIM(accountingRefId))) > 0
+            THEN SUBSTRING(
+                LTRIM(RTRIM(accountingRefId)),
+                CHARINDEX('/', LTRIM(RTRIM(accountingRefId))) + 1,
+                LEN(LTRIM(RTRIM(accountingRefId)))
+            )
+            ELSE LTRIM(RTRIM(accountingRefId))
+        END AS CustomerNumber,
+
+        COALESCE(NULLIF(LTRIM(RTRIM(name)), ''), '[UNKNOWN]') AS Name,
+        email AS Customer_Email,
+        COALESCE(phonePrimary, phoneAlternate) AS Phone,
+        address0_city AS City,
+        address0_state AS State,
+        address0_zipcode AS Zip
+    FROM BuildOps.dbo.Customers
+    WHERE
+        accountingRefId IS NOT NULL
+        AND LEN(accountingRefId) >= 4
+        AND UPPER(LEFT(LTRIM(RTRIM(accountingRefId)), 3)) = :cc
+        AND isActive = 1
+"""
+
+def load_buildops_customers(engine, company_code: str, chunksize: int = None):
+    return read_sql(BUILDOPS_CUSTOMERS_SQL, engine, params={"cc": company_code}, chunksize=chunksize)
+
+
+CUSTOMERS_SQL = {
+    "BUILDOPS": BUILDOPS_CUSTOMERS_SQL,
+    "SPECTRUM": SPECTRUM_CUSTOMERS_SQL,
+}
+
+# Server-side blocking: the database joins customers to accounts on the
+# blocking keys and only candidate pairs are transferred. LEN() ignores
+# trailing spaces and the first-letter comparison follows the column
+# collation, so the candidate set can differ slightly from block_pairs().
+CANDIDATE_PAIRS_SQL = """
+    WITH src AS ({customers}), sf AS ({accounts})
+    SELECT
+        src.CustomerId,
+        src.CustomerNumber,
+        src.Name AS BIName,
+        src.Customer_Email AS BIEmail,
+        src.Phone AS BIPhone,
+        src.City AS BICity,
+        src.State AS BIState,
+        src.Zip AS BIZip,
+        sf.Id AS AccountId,
+        sf.Name AS SFName,
+        sf.Email__c AS SFEmail,
+        sf.Phone AS SFPhone,
+        sf.BillingCity AS SFBillingCity,
+        sf.BillingState AS SFBillingState,
+        sf.BillingPostalCode AS SFBillingPostalCode,
+        sf.ShippingCity AS SFShippingCity,
+        sf.ShippingState AS SFShippingState,
+        sf.ShippingPostalCode AS SFShippingPostalCode,
+        sf.Spectrum_Customer_Code__c AS SpectrumCode
+    FROM src
+    INNER JOIN sf
+        ON UPPER(LEFT(src.Name, 1)) = UPPER(LEFT(sf.Name, 1))
+       AND ABS(LEN(src.Name) - LEN(sf.Name)) <= {window}
+"""
+
+def load_candidate_pairs(engine, company_code: str, source_system: str, chunksize: int = None):
+    query = CANDIDATE_PAIRS_SQL.format(
+        customers=CUSTOMERS_SQL[source_system],
+        accounts=SF_ACCOUNTS_SQL,
+        window=NAME_LEN_WINDOW,
+    )
+    return read_sql(query, engine, params={"cc": company_code}, chunksize=chunksize)
+
+######################################################################
+# NAME SCORING
+######################################################################
+
+def name_distances(bi_norm: np.ndarray, sf_norm: np.ndarray, max_dist: int) -> np.ndarray:
     """
-    return pd.read_sql(text(query), engine, params={"cc": company_code})
+    Name distance for each candidate pair: the smaller of the legacy
+    Levenshtein distance and the fuzzy score mapped onto the same scale.
+    Identical names are 0 without scoring. Pairs where either normalized
+    name is empty get max_dist + 1.
+    """
+    bi_len = np.fromiter(map(len, bi_norm), dtype=np.int32, count=len(bi_norm))
+    sf_len = np.fromiter(map(len, sf_norm), dtype=np.int32, count=len(sf_norm))
+    min_len = np.minimum(bi_len, sf_len)
 
+    dist = np.zeros(len(bi_norm), dtype=np.int64)
+    todo = (bi_norm != sf_norm) & (min_len > 0)
+    bi_todo, sf_todo = bi_norm[todo], sf_norm[todo]
 
-def load_buildops_customers(engine, company_code: str) -> pd.DataFrame:
-    query = """
-        SELECT
-            id AS CustomerId,
-
-            CASE
-                WHEN CHARINDEX('/', LTRIM(RTRIM(accountingRefId))) > 0
-                THEN SUBSTRING(
-                    LTRIM(RTRIM(accountingRefId)),
-                    CHARINDEX('/', LTRIM(RTRIM(accountingRefId))) + 1,
-                    LEN(LTRIM(RTRIM(accountingRefId)))
-                )
-                ELSE LTRIM(RTRIM(accountingRefId))
-            END AS CustomerNumber,
-
-            COALESCE(NULLIF(LTRIM(RTRIM(name)), ''), '[UNKNOWN]') AS Name,
-            email AS Customer_Email,
-            COALESCE(phonePrimary, phoneAlternate) AS Phone,
-            address0_city AS City,
-            address0_state AS State,
-            address0_zipcode AS Zip
-        FROM BuildOps.dbo.Customers
-        WHERE
-            accountingRefId IS NOT NULL
-            AND LEN(accountingRefId) >= 4
-            AND UPPER(LEFT(LTRIM(RTRIM(accountingRefId)), 3)) = :cc
-            AND isActive = 1;
+    # Short names only count as a name match when identical
+    legacy_dist = compute_distances(bi_todo, sf_todo, max_dist)
+    legacy_dist[min_len[todo] < 4] = max_dist
+
+    fuzzy_dist = fuzzy_scores_to_dist(fuzzy_similarity_scores(bi_todo, sf_todo), max_dist)
+
+    dist[todo] = np.minimum(legacy_dist, fuzzy_dist)
+    dist[min_len == 0] = max_dist + 1
+    return dist
+
+
+def pair_name_distances(bi_norm: np.ndarray, sf_norm: np.ndarray, max_dist: int) -> np.ndarray:
     """
-    return pd.read_sql(text(query), engine, params={"cc": company_code})
+    name_distances() for every candidate pair, scoring each distinct
+    (BI, SF) normalized name pair only once; blocking repeats them heavily.
+    """
+    bi_codes, bi_uniq = pd.factorize(bi_norm)
+    sf_codes, sf_uniq = pd.factorize(sf_norm)
+    n_sf = max(len(sf_uniq), 1)
+    pair_codes, pair_uniq = pd.factorize(bi_codes.astype(np.int64) * n_sf + sf_codes)
+    return name_distances(
+        bi_uniq[pair_uniq // n_sf].astype(object),
+        sf_uniq[pair_uniq % n_sf].astype(object),
+        max_dist,
+    )[pair_codes]
+
 
 ######################################################################
 # BLOCKING
 ######################################################################
 
-def block_pairs(df_sf: pd.DataFrame, df_src: pd.DataFrame) -> pd.DataFrame:
+# Loaded column -> candidate pair column, per side
+SF_RENAME = {
+    "Id": "AccountId",
+    "Name": "SFName",
+    "Email__c": "SFEmail",
+    "Email__cN": "SFEmailN",
+    "Phone": "SFPhone",
+    "PhoneN": "SFPhoneN",
+    "BillingCity": "SFBillingCity",
+    "BillingCityN": "SFBillingCityN",
+    "BillingState": "SFBillingState",
+    "BillingStateN": "SFBillingStateN",
+    "BillingPostalCode": "SFBillingPostalCode",
+    "BillingPostalCodeN": "SFBillingPostalCodeN",
+    "ShippingCity": "SFShippingCity",
+    "ShippingCityN": "SFShippingCityN",
+    "ShippingState": "SFShippingState",
+    "ShippingStateN": "SFShippingStateN",
+    "ShippingPostalCode": "SFShippingPostalCode",
+    "ShippingPostalCodeN": "SFShippingPostalCodeN",
+    "Spectrum_Customer_Code__c": "SpectrumCode",
+}
+BI_RENAME = {
+    "Name": "BIName",
+    "Customer_Email": "BIEmail",
+    "Customer_EmailN": "BIEmailN",
+    "Phone": "BIPhone",
+    "PhoneN": "BIPhoneN",
+    "City": "BICity",
+    "CityN": "BICityN",
+    "State": "BIState",
+    "StateN": "BIStateN",
+    "Zip": "BIZip",
+    "ZipN": "BIZipN",
+}
+
+# Loaded columns block_pairs carries from each side into the pair rows
+PAIR_SRC_COLUMNS = [
+    "CustomerId", "CustomerNumber", "SourceSystem",
+    "Name", "Customer_Email", "City", "State",
+    "PhoneN", "ZipN", "StateN", "CityN", "Customer_EmailN",
+]
+PAIR_SF_COLUMNS = [
+    "Id", "Name", "Email__c",
+    "BillingCity", "ShippingCity", "BillingState", "ShippingState",
+    "Spectrum_Customer_Code__c",
+    "PhoneN", "BillingPostalCodeN", "ShippingPostalCodeN",
+    "BillingStateN", "ShippingStateN",
+    "BillingCityN", "ShippingCityN", "Email__cN",
+]
+
+def leading_qgrams(name: str) -> list:
+    """Distinct q-grams of the first QGRAM_SPAN characters; short names are one gram."""
+    head = name[:QGRAM_SPAN]
+    return list(dict.fromkeys(head[i:i + QGRAM_SIZE] for i in range(max(len(head) - QGRAM_SIZE + 1, 1))))
+
+def leading_qgram_keys(bi_norm, sf_norm):
+    """
+    (row index, q-gram id) key rows for both sides, with q-gram ids
+    shared between them: (bi_rows, bi_grams, sf_rows, sf_grams).
+    """
+    out = []
+    for names in (bi_norm, sf_norm):
+        grams = [leading_qgrams(n) for n in names]
+        rows = np.repeat(np.arange(len(grams), dtype=np.int32), [len(g) for g in grams])
+        out.append((rows, [g for gs in grams for g in gs]))
+    (bi_rows, bi_grams), (sf_rows, sf_grams) = out
+    codes, _ = pd.factorize(pd.Series(bi_grams + sf_grams, dtype=object))
+    codes = codes.astype(np.int32)
+    return bi_rows, codes[:len(bi_grams)], sf_rows, codes[len(bi_grams):]
+
+
+def name_prefix_keys(bi_norm, sf_norm):
+    """First PREFIX_LEN normalized characters as integer ids shared by both sides."""
+    prefixes = pd.Series(np.concatenate([bi_norm, sf_norm]), dtype=object).str[:PREFIX_LEN]
+    codes = pd.factorize(prefixes)[0].astype(np.int32)
+    return codes[:len(bi_norm)], codes[len(bi_norm):]
+
+
+def sorted_neighborhood(bi_names, sf_norm, sf_rows):
+    """
+    The distinct non-empty BI normalized names and the SF names at sf_rows
+    sorted together, as (sorted names, sf position or -1 for a BI name). Built from
+    every BI name of the company, so each name's neighbours do not depend
+    on which customer chunk it arrives in.
+    """
+    bi_names = pd.unique(np.asarray(bi_names, dtype=object))
+    bi_names = bi_names[bi_names != ""]
+    names = np.concatenate([bi_names, sf_norm[sf_rows]])
+    sf_at = np.concatenate([np.full(len(bi_names), -1, dtype=sf_rows.dtype), sf_rows])
+    # Stable, so a BI name sorts ahead of SF names equal to it
+    order = np.argsort(names, kind="stable")
+    return names[order], sf_at[order]
+
+
+def sorted_neighborhood_pairs(neighborhood, src_norm, src_rows):
+    """
+    (src positions, sf positions) for every BI/SF pair at most
+    NEIGHBORHOOD_WINDOW places apart in a sorted_neighborhood() order;
+    each distinct BI name gets at most 2 * NEIGHBORHOOD_WINDOW candidates
+    however common its first letter is.
+    """
+    names, sf_at = neighborhood
+    # Distinct BI names sort ahead of equal SF names, so the leftmost match is the name itself
+    bi_at = np.searchsorted(names, src_norm[src_rows], side="left")
+    src_pos, sf_pos = [], []
+    for offset in range(-NEIGHBORHOOD_WINDOW, NEIGHBORHOOD_WINDOW + 1):
+        at = bi_at + offset
+        at_ok = (at >= 0) & (at < len(names))
+        nb_sf = np.zeros(len(at), dtype=bool)
+        nb_sf[at_ok] = sf_at[at[at_ok]] >= 0
+        src_pos.append(src_rows[nb_sf])
+        sf_pos.append(sf_at[at[nb_sf]])
+    return np.concatenate(src_pos), np.concatenate(sf_pos)
+
+
+def key_join_pairs(df_sf: pd.DataFrame, df_src: pd.DataFrame, src_rows, sf_rows):
+    """(src positions, sf positions) joined on first char, name length window and BLOCKING_KEY."""
+    src_norm = df_src["NameNorm"].to_numpy(dtype=object)
+    sf_norm = df_sf["NameNorm"].to_numpy(dtype=object)
+    src_first_all = df_src["FirstChar"].to_numpy()
+    sf_first_all = df_sf["FirstChar"].to_numpy()
+
+    # One key row per (first char, acceptable BI name length) for every SF
+    # account, so a single equi-join yields exactly the pairs inside the
+    # length window instead of a first-char cross product filtered afterwards.
+    # Key frames stay narrow (int32 / int16 / int32) to keep the join small.
+    on = ["FirstChar", "NameLen_bi"]
+    extra_src, extra_sf = {}, {}
+    if BLOCKING_KEY == "qgram":
+        # One key row per leading q-gram as well; a pair joins once per
+        # shared q-gram and is deduplicated after the merge
+        src_idx, src_grams, sf_idx, sf_grams = leading_qgram_keys(
+            src_norm[src_rows], sf_norm[sf_rows]
+        )
+        src_rows, sf_rows = src_rows[src_idx], sf_rows[sf_idx]
+        extra_src, extra_sf = {"Gram": src_grams}, {"Gram": sf_grams}
+        on.append("Gram")
+    elif BLOCKING_KEY == "prefix":
+        # One key row per name, so no pair can join twice
+        src_prefix, sf_prefix = name_prefix_keys(src_norm[src_rows], sf_norm[sf_rows])
+        extra_src, extra_sf = {"Prefix": src_prefix}, {"Prefix": sf_prefix}
+        on.append("Prefix")
+
+    # Rows whose first char has no counterpart on the other side can never
+    # join, so they are left out of the key frames before the 7x expansion
+    common = np.intersect1d(src_first_all, sf_first_all)
+    src_keep = np.isin(src_first_all[src_rows], common)
+    sf_keep = np.isin(sf_first_all[sf_rows], common)
+    src_rows, sf_rows = src_rows[src_keep], sf_rows[sf_keep]
+    extra_src = {k: v[src_keep] for k, v in extra_src.items()}
+    extra_sf = {k: v[sf_keep] for k, v in extra_sf.items()}
+
+    sf_first = sf_first_all[sf_rows]
+    sf_len = df_sf["NameLen"].to_numpy()[sf_rows]
+    sf_keys = pd.concat(
+        [
+            pd.DataFrame({
+                "FirstChar": sf_first,
+                "NameLen_bi": sf_len + delta,
+                "_sf_pos": sf_rows,
+                **extra_sf,
+            })
+            for delta in range(-NAME_LEN_WINDOW, NAME_LEN_WINDOW + 1)
+        ],
+        ignore_index=True,
+    )
+    src_keys = pd.DataFrame({
+        "FirstChar": src_first_all[src_rows],
+        "NameLen_bi": df_src["NameLen"].to_numpy()[src_rows],
+        "_src_pos": src_rows,
+        **extra_src,
+    })
+
+    keys = src_keys.merge(sf_keys, on=on, how="inner")
+    if BLOCKING_KEY == "qgram":
+        keys = keys.drop_duplicates(["_src_pos", "_sf_pos"])
+    return keys["_src_pos"].to_numpy(), keys["_sf_pos"].to_numpy()
+
+
+def block_pairs(df_sf: pd.DataFrame, df_src: pd.DataFrame, max_dist: int, neighborhood=None) -> pd.DataFrame:
+    """
+    Candidate (BI, SF) pairs: same first letter (sorted-name neighbours
+    under BLOCKING_KEY=neighborhood), raw name lengths within
+    NAME_LEN_WINDOW, and a name distance of at most max_dist. Names are
+    scored on the compact position pairs; only surviving pairs are widened, and
+    only with the columns compute_matches reads, plus the distance in Dist.
+    neighborhood is the company-wide sorted_neighborhood() order when
+    df_src is one chunk of the company's customers; df_src's own by default.
+    """
     if df_sf.empty or df_src.empty:
         return pd.DataFrame()
 
-    df_sf = df_sf.rename(columns={
-        "Id": "AccountId",
-        "Name": "SFName",
-        "Email__c": "SFEmail",
-        "Phone": "SFPhone",
-        "BillingCity": "SFBillingCity",
-        "BillingState": "SFBillingState",
-        "BillingPostalCode": "SFBillingPostalCode",
-        "ShippingCity": "SFShippingCity",
-        "ShippingState": "SFShippingState",
-        "ShippingPostalCode": "SFShippingPostalCode",
-        "Spectrum_Customer_Code__c": "SpectrumCode"
-    })
+    # The loaded frames are only read by position here; nothing is renamed
+    # or copied until the surviving pairs are widened
+    src_norm = df_src["NameNorm"].to_numpy(dtype=object)
+    sf_norm = df_sf["NameNorm"].to_numpy(dtype=object)
 
-    df_src = df_src.rename(columns={
-        "Name": "BIName",
-        "Customer_Email": "BIEmail",
-        "Phone": "BIPhone",
-        "City": "BICity",
-        "State": "BIState",
-        "Zip": "BIZip"
-    })
+    # Names that are missing or normalize to nothing (e.g. just "Inc.") can
+    # never match, so they are dropped before the join fans rows out
+    src_rows = np.flatnonzero(src_norm != "").astype(np.int32)
+    sf_rows = np.flatnonzero(sf_norm != "").astype(np.int32)
+
+    if BLOCKING_KEY == "neighborhood":
+        if neighborhood is None:
+            neighborhood = sorted_neighborhood(src_norm[src_rows], sf_norm, sf_rows)
+        src_pos, sf_pos = sorted_neighborhood_pairs(neighborhood, src_norm, src_rows)
+        # Same raw name length window as the key join
+        src_len = df_src["NameLen"].to_numpy().astype(np.int32)
+        sf_len = df_sf["NameLen"].to_numpy().astype(np.int32)
+        within = np.abs(src_len[src_pos] - sf_len[sf_pos]) <= NAME_LEN_WINDOW
+        src_pos, sf_pos = src_pos[within], sf_pos[within]
+    else:
+        src_pos, sf_pos = key_join_pairs(df_sf, df_src, src_rows, sf_rows)
+
+    dist = pair_name_distances(src_norm[src_pos], sf_norm[sf_pos], max_dist)
+    keep = dist <= max_dist
+
+    # Only the columns compute_matches reads are widened to pair rows, and
+    # only those small frames get the pair column names
+    src_cols = [c for c in PAIR_SRC_COLUMNS if c in df_src]
+    pairs = pd.concat(
+        [
+            df_src[src_cols].iloc[src_pos[keep]].reset_index(drop=True).rename(columns=BI_RENAME),
+            df_sf[PAIR_SF_COLUMNS].iloc[sf_pos[keep]].reset_index(drop=True).rename(columns=SF_RENAME),
+        ],
+        axis=1,
+    )
+    pairs["Dist"] = dist[keep]
+    return pairs
 
-    df_sf["FirstChar"] = df_sf["SFName"].str[0].str.upper()
-    df_src["FirstChar"] = df_src["BIName"].str[0].str.upper()
 
-    df_sf["NameLen_sf"] = df_sf["SFName"].str.len()
-    df_src["NameLen_bi"] = df_src["BIName"].str.len()
+def filter_candidate_pairs(df_pairs: pd.DataFrame, max_dist: int) -> pd.DataFrame:
+    """Name-score pairs blocked by load_candidate_pairs(); keep those within max_dist."""
+    if df_pairs.empty:
+        return df_pairs
 
-    merged = df_src.merge(df_sf, on="FirstChar", how="inner")
-    return merged[(merged["NameLen_bi"] - merged["NameLen_sf"]).abs() <= 3]
+    dist = pair_name_distances(
+        normalize_names(df_pairs["BIName"]).to_numpy(dtype=object),
+        normalize_names(df_pairs["SFName"]).to_numpy(dtype=object),
+        max_dist,
+    )
+    keep = dist <= max_dist
+    df_pairs = df_pairs[keep].reset_index(drop=True)
+    df_pairs["Dist"] = dist[keep]
+    return add_contact_keys(df_pairs, PAIR_CONTACT_NORMALIZERS)
 
 ######################################################################
 # COMPANY CODES
@@ -198,7 +704,7 @@ def load_all_company_codes(engine):
         WHERE Company_Code__c IS NOT NULL
         ORDER BY Company_Code__c;
     """
-    df = pd.read_sql(text(query), engine)
+    df = read_sql(query, engine)
     return df["Company_Code__c"].dropna().tolist()
 
 ######################################################################
@@ -206,145 +712,237 @@ def load_all_company_codes(engine):
 ######################################################################
 
 def compute_matches(df_pairs: pd.DataFrame, max_dist: int) -> pd.DataFrame:
-    results = []
+    if df_pairs.empty:
+        return pd.DataFrame()
 
-    for _, row in df_pairs.iterrows():
-        bi_norm = normalize(row["BIName"] or "")
-        sf_norm = normalize(row["SFName"] or "")
+    # Scores are tiny ranges: int8 per signal, int16 for Dist and the total
+    dist = df_pairs["Dist"].to_numpy().astype(np.int16)
+    email_score = vectorized_email_score(df_pairs["BIEmailN"], df_pairs["SFEmailN"]).astype(np.int8)
+    phone_score = vectorized_phone_score(df_pairs["BIPhoneN"], df_pairs["SFPhoneN"]).astype(np.int8)
+    zip_score = vectorized_zip_score(
+        df_pairs["BIZipN"], df_pairs["SFBillingPostalCodeN"], df_pairs["SFShippingPostalCodeN"]
+    ).astype(np.int8)
+    city_score = vectorized_city_score(
+        df_pairs["BICityN"], df_pairs["SFBillingCityN"], df_pairs["SFShippingCityN"]
+    ).astype(np.int8)
+    state_score = vectorized_state_score(
+        df_pairs["BIStateN"], df_pairs["SFBillingStateN"], df_pairs["SFShippingStateN"]
+    ).astype(np.int8)
 
-        min_len = min(len(bi_norm), len(sf_norm))
-        if min_len == 0:
-            continue
+    strong_signals = (
+        (dist <= 1).astype(np.int8)
+        + (email_score < 0)
+        + (phone_score < 0)
+        + (zip_score < 0)
+        + (city_score < 0)
+        + (state_score < 0)
+    )
 
-        if min_len < 4:
-            legacy_dist = 0 if bi_norm == sf_norm else max_dist
-        else:
-            legacy_dist = compute_distance(bi_norm, sf_norm)
+    multi_signal_bonus = np.where(strong_signals >= 3, -1, 0).astype(np.int8)
+    total_score = dist + email_score + phone_score + zip_score + city_score + state_score + multi_signal_bonus
 
-        fuzzy_score = fuzzy_similarity_score(bi_norm, sf_norm)
-        fuzzy_dist = fuzzy_score_to_dist(fuzzy_score, max_dist)
+    confidence = np.select([total_score <= 0, total_score <= 2], ["HIGH", "MEDIUM"], "LOW").astype(object)
 
-        dist = min(legacy_dist, fuzzy_dist)
-        if dist > max_dist:
-            continue
-
-        email_score = 0
-        bi_email = (row.get("BIEmail") or "").lower().strip()
-        sf_email = (row.get("SFEmail") or "").lower().strip()
-        if bi_email and sf_email:
-            if bi_email == sf_email or email_domain(bi_email) == email_domain(sf_email):
-                email_score = -1
-
-        phone_score = -2 if (
-            normalize_phone(row.get("BIPhone")) and
-            normalize_phone(row.get("BIPhone")) == normalize_phone(row.get("SFPhone"))
-        ) else 0
-
-        bi_city = (row.get("BICity") or "").lower().strip()
-        sf_cities = [
-            (row.get("SFBillingCity") or "").lower().strip(),
-            (row.get("SFShippingCity") or "").lower().strip(),
-        ]
-        sf_cities = [c for c in sf_cities if c]
-
-        if bi_city and bi_city in sf_cities:
-            city_score = -1
-        elif bi_city and sf_cities:
-            city_score = 1
-        else:
-            city_score = 0
-
-        zip_score = -1 if normalize_zip(row.get("BIZip")) in [
-            normalize_zip(row.get("SFBillingPostalCode")),
-            normalize_zip(row.get("SFShippingPostalCode"))
-        ] and normalize_zip(row.get("BIZip")) else 0
-
-        bi_state = normalize_state(row.get("BIState"))
-        sf_states = [
-            normalize_state(row.get("SFBillingState")),
-            normalize_state(row.get("SFShippingState")),
-        ]
-        sf_states = [s for s in sf_states if s]
-
-        if bi_state and bi_state in sf_states:
-            state_score = -1
-        elif bi_state and sf_states:
-            state_score = 1
-        else:
-            state_score = 0
-
-        strong_signals = sum([
-            dist <= 1,
-            email_score < 0,
-            phone_score < 0,
-            zip_score < 0,
-            city_score < 0,
-            state_score < 0
-        ])
-
-        multi_signal_bonus = -1 if strong_signals >= 3 else 0
-        total_score = dist + email_score + phone_score + zip_score + city_score + state_score + multi_signal_bonus
-
-        confidence = "HIGH" if total_score <= 0 else "MEDIUM" if total_score <= 2 else "LOW"
-
-        results.append({
-            "CompanyCode": row["CompanyCode"],
-
-            "BuildOpsName": row.get("BIName"),
-            "BuildOpsEmail": row.get("BIEmail"),
-            "BuildOpsCity": row.get("BICity"),
-            "BuildOpsState": row.get("BIState"),
-
-            "SalesforceName": row.get("SFName"),
-            "SalesforceEmail": row.get("SFEmail"),
-            "SalesforceCityBilling": row.get("SFBillingCity"),
-            "SalesforceCityShipping": row.get("SFShippingCity"),
-            "SalesforceStateBilling": row.get("SFBillingState"),
-            "SalesforceStateShipping": row.get("SFShippingState"),
-
-            # Business-facing customer identifier
-            "CustomerId": (
-                row["CustomerNumber"]
-                if row.get("SourceSystem", "BUILDOPS") == "BUILDOPS"
-                else row["CustomerId"]
-            ),
-
-            # Optional: keep CustomerNumber for traceability
-            "CustomerNumber": row["CustomerNumber"],
-            "AccountId": row["AccountId"],
-            "Spectrum_Customer_Code__c": row.get("SpectrumCode"),
-
-            "Dist": dist,
-            "EmailScore": email_score,
-            "PhoneScore": phone_score,
-            "ZipScore": zip_score,
-            "AddressCityScore": city_score,
-            "StateScore": state_score,
-            "MultiSignalBonus": multi_signal_bonus,
-            "TotalScore": total_score,
-            "ConfidenceBand": confidence
-        })
-
-    df = pd.DataFrame(results)
-    if not df.empty:
-        df["BestMatchFlag"] = df.groupby("CustomerId")["TotalScore"].transform(
-            lambda s: (s == s.min()).astype(int)
+    # Business-facing customer identifier
+    if "SourceSystem" in df_pairs:
+        customer_id = df_pairs["CustomerNumber"].where(
+            df_pairs["SourceSystem"] == "BUILDOPS", df_pairs["CustomerId"]
         )
+    else:
+        customer_id = df_pairs["CustomerNumber"]
+
+    return pd.DataFrame({
+        "CompanyCode": df_pairs["CompanyCode"],
+
+        "BuildOpsName": df_pairs["BIName"],
+        "BuildOpsEmail": df_pairs["BIEmail"],
+        "BuildOpsCity": df_pairs["BICity"],
+        "BuildOpsState": df_pairs["BIState"],
+
+        "SalesforceName": df_pairs["SFName"],
+        "SalesforceEmail": df_pairs["SFEmail"],
+        "SalesforceCityBilling": df_pairs["SFBillingCity"],
+        "SalesforceCityShipping": df_pairs["SFShippingCity"],
+        "SalesforceStateBilling": df_pairs["SFBillingState"],
+        "SalesforceStateShipping": df_pairs["SFShippingState"],
+
+        "CustomerId": customer_id,
+
+        # Optional: keep CustomerNumber for traceability
+        "CustomerNumber": df_pairs["CustomerNumber"],
+        "AccountId": df_pairs["AccountId"],
+        "Spectrum_Customer_Code__c": df_pairs["SpectrumCode"],
+
+        "Dist": dist,
+        "EmailScore": email_score,
+        "PhoneScore": phone_score,
+        "ZipScore": zip_score,
+        "AddressCityScore": city_score,
+        "StateScore": state_score,
+        "MultiSignalBonus": multi_signal_bonus,
+        "TotalScore": total_score,
+        "ConfidenceBand": confidence,
+    }).reset_index(drop=True)
+
+
+def flag_best_matches(df: pd.DataFrame) -> pd.DataFrame:
+    """Mark each customer's lowest-TotalScore match(es) with BestMatchFlag=1."""
+    best = df.groupby("CustomerId")["TotalScore"].transform("min")
+    df["BestMatchFlag"] = (df["TotalScore"] == best).astype(np.int8)
     return df
 
 ######################################################################
 # INSERT
 ######################################################################
 
+# ResultsBI load path: executemany (fast_executemany batch) | tvp (one
+# table-valued parameter). tvp needs a user-defined table type with the
+# result columns in insert order, e.g. CREATE TYPE dbo.ResultsBI_TVP AS TABLE (...).
+INSERT_METHOD = SETTINGS.INSERT_METHOD
+INSERT_BATCH_SIZE = SETTINGS.INSERT_BATCH_SIZE
+RESULTS_TVP_TYPE = ("ResultsBI_TVP", "dbo")
+BULK_INSERT_DIR = SETTINGS.BULK_INSERT_DIR
+BULK_INSERT_SERVER_DIR = SETTINGS.BULK_INSERT_SERVER_DIR
+
+def _csv_field(col: pd.Series) -> pd.Series:
+    """
+    CSV text for one column: NULL is an empty unquoted field and text is
+    always quoted, so BULK INSERT keeps "" apart from NULL like executemany does.
+    """
+    present = col.notna()
+    field = col.astype(object).where(present, "").astype(str)
+    if not pd.api.types.is_numeric_dtype(col):
+        field = '"' + field.str.replace('"', '""', regex=False) + '"'
+    return field.where(present, "")
+
+def bulk_insert_results(cursor, df: pd.DataFrame, cols: list) -> None:
+    """
+    Load df into ResultsBI with one server-side BULK INSERT of a CSV
+    staged in BULK_INSERT_DIR (read back through BULK_INSERT_SERVER_DIR),
+    via a session temp table so columns are matched by name rather than
+    by table ordinal.
+    """
+    col_list = ", ".join(f"[{c}]" for c in cols)
+    name = f"ResultsBI_{uuid.uuid4().hex}.csv"
+    path = os.path.join(BULK_INSERT_DIR, name)
+    # The server may be on another OS; join with the separator its path uses
+    sep = "\\" if "\\" in BULK_INSERT_SERVER_DIR else "/"
+    server_path = BULK_INSERT_SERVER_DIR.rstrip("/\\") + sep + name
+    # Quoted into a T-SQL string literal below
+    server_path = server_path.replace("'", "''")
+
+    fields = [_csv_field(df[c]) for c in cols]
+    lines = fields[0].str.cat(fields[1:], sep=",")
+    try:
+        # Written inside the try so a partly written file is removed too
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write("\n".join(lines) + "\n")
+        cursor.execute(f"SELECT TOP 0 {col_list} INTO #ResultsBI_load FROM ResultsBI")
+        cursor.execute(
+            f"BULK INSERT #ResultsBI_load FROM '{server_path}' WITH "
+            "(FORMAT = 'CSV', FIELDQUOTE = '\"', CODEPAGE = '65001', "
+            "ROWTERMINATOR = '0x0a', KEEPNULLS, TABLOCK)"
+        )
+        cursor.execute(f"INSERT INTO ResultsBI ({col_list}) SELECT {col_list} FROM #ResultsBI_load")
+        cursor.execute("DROP TABLE #ResultsBI_load")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
 def insert_results(engine, df: pd.DataFrame) -> int:
     df["RunDate"] = timestamp()
-    df.to_sql("ResultsBI", engine, if_exists="append", index=False)
+
+    cols = list(df.columns)
+    col_list = ", ".join(f"[{c}]" for c in cols)
+    if INSERT_METHOD == "tvp":
+        sql = f"INSERT INTO ResultsBI ({col_list}) SELECT * FROM ?"
+    else:
+        sql = f"INSERT INTO ResultsBI ({col_list}) VALUES ({', '.join('?' * len(cols))})"
+
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        # Small frames aren't worth the file round trip; they take executemany
+        if INSERT_METHOD == "bulk" and len(df) > INSERT_BATCH_SIZE:
+            bulk_insert_results(cursor, df, cols)
+            conn.commit()
+            return len(df)
+
+        cursor.fast_executemany = True
+        # Send INSERT_BATCH_SIZE rows per round trip so neither the Python
+        # row tuples nor pyodbc's parameter array grow with the whole frame
+        for start in range(0, len(df), INSERT_BATCH_SIZE):
+            batch = df.iloc[start:start + INSERT_BATCH_SIZE]
+            # pyodbc wants plain Python values: NaN -> None, numpy ints -> int
+            rows = list(
+                batch.astype(object).where(batch.notna(), None).itertuples(index=False, name=None)
+            )
+            if INSERT_METHOD == "tvp":
+                # The batch travels as one structured parameter; pyodbc
+                # takes the type name and schema as the first two list items
+                cursor.execute(sql, ([*RESULTS_TVP_TYPE, *rows],))
+            else:
+                cursor.executemany(sql, rows)
+        conn.commit()
+    finally:
+        conn.close()
     return len(df)
 
 ######################################################################
 # MAIN
 ######################################################################
 
+def candidate_pair_chunks(conn, company_code: str, source_system: str, max_dist: int):
+    """Name-scored candidate pairs for one company, one customer chunk at a time."""
+    if BLOCKING_MODE == "sql":
+        for df_pairs in load_candidate_pairs(conn, company_code, source_system, chunksize=READ_CHUNKSIZE):
+            yield filter_candidate_pairs(df_pairs, max_dist)
+        return
+
+    if source_system == "BUILDOPS":
+        load_customers = load_buildops_customers
+    else:
+        load_customers = load_spectrum_customers
+
+    # Normalized once, before blocking fans rows out into pairs
+    df_sf = get_sf_accounts(conn, company_code)
+    if df_sf.empty:
+        return
+
+    # Sorted-neighbourhood blocking needs every customer name of the
+    # company up front, or a name's neighbours would depend on its chunk;
+    # this costs one extra read of the customers, keeping only their names
+    neighborhood = None
+    if BLOCKING_KEY == "neighborhood":
+        bi_names = [
+            pd.unique(normalize_names(df["Name"]).to_numpy(dtype=object))
+            for df in load_customers(conn, company_code, chunksize=READ_CHUNKSIZE)
+        ]
+        sf_norm = df_sf["NameNorm"].to_numpy(dtype=object)
+        neighborhood = sorted_neighborhood(
+            np.concatenate(bi_names) if bi_names else np.empty(0, dtype=object),
+            sf_norm,
+            np.flatnonzero(sf_norm != "").astype(np.int32),
+        )
+
+    # Stream customers in chunks against the account side loaded once,
+    # so peak memory is bounded by the chunk rather than the company
+    for df_src in load_customers(conn, company_code, chunksize=READ_CHUNKSIZE):
+        if df_src.empty:
+            continue
+        df_src = add_contact_keys(add_name_keys(df_src), BI_CONTACT_NORMALIZERS)
+        yield block_pairs(df_sf, df_src, max_dist, neighborhood)
+
+
+def constant_category(value: str, n: int) -> pd.Categorical:
+    """
+    A column holding one label n times as a categorical: one byte per row
+    instead of an object pointer, and chunks built with the same label
+    stay categorical when concatenated.
+    """
+    return pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=[value])
+
+
 def run_pipeline(
     engine,
     company_code: str,
@@ -353,26 +951,87 @@ def run_pipeline(
     batch_scores=False,
     final_scores=False,
 ):
-    df_sf = load_sf_accounts(engine, company_code)
-
-    if source_system == "BUILDOPS":
-        df_src = load_buildops_customers(engine, company_code)
-    elif source_system == "SPECTRUM":
-        df_src = load_spectrum_customers(engine, company_code)
-    else:
+    if source_system not in ("BUILDOPS", "SPECTRUM"):
         raise ValueError(f"Unknown source_system: {source_system}")
 
-    if df_sf.empty or df_src.empty:
-        return
+    results = []
+    with engine.connect() as conn:
+        for df_pairs in candidate_pair_chunks(conn, company_code, source_system, max_dist):
+            if df_pairs.empty:
+                continue
 
-    df_pairs = block_pairs(df_sf, df_src)
-    if df_pairs.empty:
-        return
+            df_pairs["CompanyCode"] = constant_category(company_code, len(df_pairs))
+            df_chunk = compute_matches(df_pairs, max_dist)
+            if not df_chunk.empty:
+                results.append(df_chunk)
 
-    df_pairs["CompanyCode"] = company_code
-    df_results = compute_matches(df_pairs, max_dist)
-    if df_results.empty:
+    if not results:
         return
 
-    df_results["SourceSystem"] = source_system
+    # A customer number can span chunks, so best matches are picked last
+    df_results = flag_best_matches(pd.concat(results, ignore_index=True))
+    df_results["SourceSystem"] = constant_category(source_system, len(df_results))
     insert_results(engine, df_results)
+
+######################################################################
+# PARALLEL RUNS
+######################################################################
+
+def _init_worker(conn_str: str, workers: int):
+    # Forked workers inherit the parent's engine; drop its pooled
+    # connections (without closing the parent's sockets) so each worker
+    # lazily opens its own, and closes them when the worker exits.
+    engine = get_engine(conn_str)
+    engine.dispose(close=False)
+    mp_util.Finalize(engine, engine.dispose, exitpriority=10)
+
+    # Split the cores between workers instead of every worker's scoring
+    # calls threading across all of them
+    set_scoring_threads((os.cpu_count() or 1) // workers)
+
+
+def run_pipeline_for_code(
+    conn_str: str,
+    company_code: str,
+    source_systems=("BUILDOPS",),
+    max_dist: int = SETTINGS.MAX_DIST,
+    batch_scores=False,
+    final_scores=False,
+) -> str:
+    """Run each source system for one company code on this process's engine."""
+    engine = get_engine(conn_str)
+    print(f"\n[{timestamp()}] === Running company code: {company_code} ===")
+
+    for source_system in source_systems:
+        run_pipeline(
+            engine=engine,
+            company_code=company_code,
+            max_dist=max_dist,
+            source_system=source_system,
+            batch_scores=batch_scores,
+            final_scores=final_scores,
+        )
+
+    print(f"[{timestamp()}] === Finished company code: {company_code} ===\n")
+    return company_code
+
+
+def run_pipeline_for_codes(conn_str: str, company_codes, workers: int = 1, **kwargs):
+    """
+    run_pipeline_for_code() for every company code. Codes are independent,
+    so with workers > 1 they run in a process pool and finish in any order.
+    """
+    run_one = partial(run_pipeline_for_code, conn_str, **kwargs)
+    workers = min(workers, len(company_codes))
+    if workers <= 1:
+        for code in company_codes:
+            run_one(code)
+        return
+
+    with mp.Pool(processes=workers, initializer=_init_worker, initargs=(conn_str, workers)) as pool:
+        for _ in pool.imap_unordered(run_one, company_codes):
+            pass
+        # Let workers exit normally (running their engine finalizer)
+        # instead of being terminated when the with block closes the pool
+        pool.close()
+        pool.join()
@@ -1,3 +1,7 @@
+import numpy as np
+import pandas as pd
+
+
 def email_score(e1,e2):
     if not e1 or not e2: return 0
     return -1 if e1.strip().lower()==e2.strip().lower() else 0
@@ -23,3 +27,36 @@ def customer_code_score(c1, c2):
     if not c1 or not c2:
         return 0
     return -2 if str(c1).strip().upper() == str(c2).strip().upper() else 0
+
+
+# --- Vectorized scorers used by the pipeline ---
+def vectorized_email_score(s_a: pd.Series, s_b: pd.Series) -> np.ndarray:
+    """Email domain codes (0 = no email): -1 where both are present and share a domain."""
+    a, b = s_a.to_numpy(), s_b.to_numpy()
+    return np.where((a != 0) & (a == b), -1, 0)
+
+def _either_match_score(code: pd.Series, code_1: pd.Series, code_2: pd.Series) -> np.ndarray:
+    """Integer codes (0 = unknown): -1 if either candidate matches, 1 if neither does, 0 if unknown."""
+    c, c1, c2 = (s.to_numpy() for s in (code, code_1, code_2))
+    known = c != 0
+    match = known & ((c == c1) | (c == c2))
+    mismatch = known & ((c1 != 0) | (c2 != 0))
+    return np.select([match, mismatch], [-1, 1], 0)
+
+def vectorized_city_score(s_city: pd.Series, s_city_1: pd.Series, s_city_2: pd.Series) -> np.ndarray:
+    """City codes: -1 if the city matches either candidate city, 1 if it matches neither, 0 if unknown."""
+    return _either_match_score(s_city, s_city_1, s_city_2)
+
+def vectorized_phone_score(s_a: pd.Series, s_b: pd.Series) -> np.ndarray:
+    """-2 where both normalized phones are present and equal."""
+    a, b = s_a.to_numpy(dtype=object), s_b.to_numpy(dtype=object)
+    return np.where((a != "") & (a == b), -2, 0)
+
+def vectorized_zip_score(s_zip: pd.Series, s_zip_1: pd.Series, s_zip_2: pd.Series) -> np.ndarray:
+    """-1 where the normalized zip is present and matches either candidate zip."""
+    z, z1, z2 = (s.to_numpy(dtype=object) for s in (s_zip, s_zip_1, s_zip_2))
+    return np.where((z != "") & ((z == z1) | (z == z2)), -1, 0)
+
+def vectorized_state_score(s_state: pd.Series, s_state_1: pd.Series, s_state_2: pd.Series) -> np.ndarray:
+    """State codes: -1 if either candidate matches, 1 if neither does, 0 if unknown."""
+    return _either_match_score(s_state, s_state_1, s_state_2)